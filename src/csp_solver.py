@@ -7,16 +7,30 @@ that abides by some number of constraints.
 In this module:
 - A solver that uses the backtracking exact solver approach
 - Tools for pruning domains using node and arc consistency
+- Independent groups of meetings are solved separately, optionally in parallel when hard
 '''
-from datetime import *
-from date_constraints import *
-from dataclasses import *
-from copy import *
+from datetime import datetime
+from typing import Any, Optional
+from heapq import heapify, heappush, heappop
+from multiprocessing import Pool
+from os import cpu_count
+from date_constraints import DateConstraint
 
+# CSP Backtracking Constants
+# ---------------------------------------------------------------------------
+# The most (meeting, domain) pairs the backtracker remembers across the failed subproblems
+# of a component, evicting the oldest subproblems first
+NO_GOOD_CACHE_SIZE: int = 250_000
+# Only subproblems with at most this many meetings left are remembered: their keys are cheap
+# to build at every search node, and they're the ones a search keeps running back into
+NO_GOOD_MAX_MEETINGS: int = 32
+# When solving in parallel, the search nodes each component is given in this process first;
+# only components that don't finish within them are worth starting worker processes for
+PARALLEL_NODE_BUDGET: int = 10_000
 
 # CSP Backtracking Solver
 # ---------------------------------------------------------------------------
-def solve(n_meetings: int, date_range: list[set[datetime]] | set[datetime], constraints: set[DateConstraint]) -> Optional[list[datetime]]:
+def solve(n_meetings: int, date_range: list[set[datetime]] | set[datetime], constraints: set[DateConstraint], parallel: bool = False) -> Optional[list[datetime]]:
     '''
     When possible, returns a solution to the given CSP based on the need to
     schedule n meetings within the given date range and abiding by the given
@@ -37,6 +51,12 @@ def solve(n_meetings: int, date_range: list[set[datetime]] | set[datetime], cons
             A set of DateConstraints specifying how the meetings must be scheduled.
             See DateConstraint documentation for different types of DateConstraints
             that might be found, and useful methods for implementing this solver.
+        parallel (bool):
+            Whether independent groups of meetings that take a lot of searching may be
+            solved in worker processes of their own; False by default
+            [!] WARNING: Where worker processes are spawned rather than forked (the default
+            on macOS and Windows), each one re-imports the caller's main module, so scripts
+            that pass True must guard their entry point with if __name__ == "__main__"
     
     Returns:
         Optional[list[datetime]]:
@@ -47,6 +67,9 @@ def solve(n_meetings: int, date_range: list[set[datetime]] | set[datetime], cons
                 Returns None
     '''
     
+    # The search nodes the component being searched has left, when it is searched on a budget
+    nodes_left: Optional[int] = None
+    
     def csp_backtracker(vars: int, doms: Any, date_constraints: set[DateConstraint]) -> Optional[list[datetime]]:
         '''
         A helper function that applies the backtracking algorithm to find a solution
@@ -62,56 +85,443 @@ def solve(n_meetings: int, date_range: list[set[datetime]] | set[datetime], cons
                 If a solution is found, returns a list of datetime values assigned to each variable (meeting).
                 If no solution is found, returns None.
         '''
+        nonlocal nodes_left
         
-        # Convert doms to work with node and arc consistency, does not work otherwise
-        doms = [date_range for _ in range(n_meetings)]
+        # Each variable gets its own copy of its domain so that pruning one never prunes another
+        doms = [set(dom) for dom in doms] if isinstance(doms, list) else [set(doms) for _ in range(vars)]
         node_consistency(doms, date_constraints)
-        arc_consistency(doms, date_constraints)
-        assignments = [None] * vars
-        return recursive_csp_backtracker(assignments, vars, doms, date_constraints)
+        live_constraints = singleton_pruning(doms, date_constraints)
+        if not all(doms) or not arc_consistency(doms, live_constraints):
+            return None
+        live_constraints = singleton_pruning(doms, live_constraints)
+        if not all(doms):
+            return None
+        
+        # Number every datetime that survived filtering so that the search can hold each
+        # domain as an int bitmask (bit i set <=> universe[i] still possible) instead of a set
+        universe: list[datetime] = sorted(set().union(*doms))
+        value_index = {date: index for index, date in enumerate(universe)}
+        masks: list[int] = []
+        for dom in doms:
+            mask = 0
+            for date in dom:
+                mask |= 1 << value_index[date]
+            masks.append(mask)
+        
+        # Precompute, for each side of every binary constraint, which of the neighbor's values
+        # each of this variable's values is compatible with: neighbors[var] holds pairs of
+        # (neighbor, supports) where supports[value] is the bitmask of compatible neighbor values
+        neighbors: list[list[tuple[int, list[int]]]] = [[] for _ in range(vars)]
+        # Unary constraints were enforced by node consistency and a binary constraint between
+        # a variable and itself can be enforced on its domain up front, so forward checking over
+        # these tables is the only constraint checking the search has left to do
+        for constraint in live_constraints:
+            if not isinstance(constraint.R_VAL, int):
+                continue
+            left, right = constraint.L_VAL, constraint.R_VAL
+            if left == right:
+                for value in set_bits(masks[left]):
+                    if not constraint.is_satisfied_by_values(universe[value], universe[value]):
+                        masks[left] ^= 1 << value
+                continue
+            reverse_op = constraint.get_reverse().OP
+            left_supports, right_supports = [0] * len(universe), [0] * len(universe)
+            for tail in set_bits(masks[left]):
+                left_supports[tail] = support_row(constraint.OP, tail) & masks[right]
+            for head in set_bits(masks[right]):
+                right_supports[head] = support_row(reverse_op, head) & masks[left]
+            neighbors[left].append((right, left_supports))
+            neighbors[right].append((left, right_supports))
+        
+        # Variables only interact with the others in their connected component of the
+        # constraint graph, so each component is searched on its own; a component's
+        # unassigned domains then fully determine whether its remaining search can succeed
+        components: list[list[int]] = []
+        seen = [False] * vars
+        for start in range(vars):
+            if seen[start]:
+                continue
+            seen[start] = True
+            component = [start]
+            for var in component:
+                for neighbor, _ in neighbors[var]:
+                    if not seen[neighbor]:
+                        seen[neighbor] = True
+                        component.append(neighbor)
+            components.append(component)
+        
+        # Every component is searched here first. When solving in parallel, each one only gets a
+        # node budget here, and those that run past it are handed to worker processes as CSPs of
+        # their own (threads would just take turns holding the GIL for this pure-Python search),
+        # started only once every other component has been solved
+        assignments: list[Optional[int]] = [None] * vars
+        pruned_by: list[set[int]] = [set() for _ in range(vars)]
+        hard_components: list[list[int]] = []
+        for component in components:
+            start_masks = [masks[var] for var in component]
+            nodes_left = PARALLEL_NODE_BUDGET if parallel and len(components) > 1 else None
+            try:
+                found, _ = recursive_csp_backtracker(assignments, set(component), masks, neighbors, pruned_by, NoGoods())
+            except SearchBudgetExceeded:
+                # The abandoned search left its forward checking behind, so undo it by hand
+                for var, mask in zip(component, start_masks):
+                    masks[var] = mask
+                    pruned_by[var].clear()
+                hard_components.append(component)
+                continue
+            finally:
+                nodes_left = None
+            if not found:
+                return None
+        
+        # A single worker would just search them one after another, only slower than here
+        workers = min(len(hard_components), cpu_count() or 1)
+        if workers < 2:
+            for component in hard_components:
+                found, _ = recursive_csp_backtracker(assignments, set(component), masks, neighbors, pruned_by, NoGoods())
+                if not found:
+                    return None
+        else:
+            pool = Pool(processes=workers)
+            try:
+                # Results come back in whichever order the components finish, so the first one
+                # found to have no solution ends the search without waiting on the others
+                results = pool.imap_unordered(solve_component, [
+                    (position, subproblem(component, masks, universe, live_constraints))
+                    for position, component in enumerate(hard_components)
+                ])
+                
+                # Stitch each component's solution back in by its meetings' original indexes
+                for position, solution in results:
+                    if solution is None:
+                        return None
+                    for var, date in zip(hard_components[position], solution):
+                        assignments[var] = value_index[date]
+            finally:
+                # Workers still searching the other components are killed rather than left running
+                pool.terminate()
+                pool.join()
+        
+        schedule: list[datetime] = []
+        for index in assignments:
+            assert index is not None, "[X] Every meeting should have been assigned a date."
+            schedule.append(universe[index])
+        return schedule
+
+    def subproblem(component: list[int], masks: list[int], universe: list[datetime], live_constraints: set[DateConstraint]) -> tuple[int, list[set[datetime]], set[DateConstraint]]:
+        '''
+        Restates one connected component of the constraint graph as a standalone CSP whose
+        meetings are renumbered 0 to len(component) - 1 in component order, so that it can be
+        passed to solve on its own.
+
+        Parameters:
+            component (list[int]): The indexes of the variables (meetings) in the component.
+            masks (list[int]): The domain bitmask for each variable (the available datetimes for each meeting).
+            universe (list[datetime]): Every datetime that appears in some domain, by its bit index.
+            live_constraints (set[DateConstraint]): The DateConstraints still in play.
+
+        Returns:
+            tuple[int, list[set[datetime]], set[DateConstraint]]:
+                The number of meetings, their domains and the binary constraints among them,
+                ready to be passed as the arguments to solve.
+        '''
+        local_index = {var: index for index, var in enumerate(component)}
+        sub_domains = [{universe[value] for value in set_bits(masks[var])} for var in component]
+        sub_constraints = {
+            DateConstraint(local_index[constraint.L_VAL], constraint.OP, local_index[constraint.R_VAL])
+            for constraint in live_constraints
+            if isinstance(constraint.R_VAL, int) and constraint.L_VAL in local_index
+        }
+        return len(component), sub_domains, sub_constraints
 
-    def recursive_csp_backtracker(assignments: List[Any], vars: int, doms: list[set[datetime]], constraints: set[DateConstraint]) -> Optional[list[datetime]]:
+    def singleton_pruning(doms: list[set[datetime]], date_constraints: set[DateConstraint]) -> set[DateConstraint]:
+        '''
+        Enforces every binary constraint that mentions a variable whose domain is down to a
+        single value: the other variable's domain is pruned to the values compatible with it,
+        after which the constraint can never be violated again and is dropped. Repeats while
+        that pruning leaves new singletons behind, stopping early if a domain is wiped out.
+
+        Parameters:
+            doms (list[set[datetime]]): A list of domains for each variable (the available datetimes for each meeting).
+            date_constraints (set[DateConstraint]): The DateConstraints still in play.
+
+        Returns:
+            set[DateConstraint]:
+                The given DateConstraints less the binary ones that were enforced and dropped.
+        '''
+        live_constraints = set(date_constraints)
+        pruned = True
+        while pruned and all(doms):
+            pruned = False
+            for constraint in list(live_constraints):
+                if not isinstance(constraint.R_VAL, int):
+                    continue
+                left, right = constraint.L_VAL, constraint.R_VAL
+                if left == right:
+                    if len(doms[left]) != 1:
+                        continue
+                    value = next(iter(doms[left]))
+                    if not constraint.is_satisfied_by_values(value, value):
+                        doms[left].clear()
+                elif len(doms[left]) == 1:
+                    doms[right].intersection_update(constraint.get_reverse().valid_tails_for(doms[right], doms[left]))
+                elif len(doms[right]) == 1:
+                    doms[left].intersection_update(constraint.valid_tails_for(doms[left], doms[right]))
+                else:
+                    continue
+                live_constraints.discard(constraint)
+                pruned = True
+        return live_constraints
+
+    def recursive_csp_backtracker(assignments: list[Optional[int]], unassigned: set[int], masks: list[int], neighbors: list[list[tuple[int, list[int]]]], pruned_by: list[set[int]], no_good: NoGoods) -> tuple[bool, set[int]]:
         '''
         The recursive backtracking function that explores all possible assignments for the variables,
         checking each one against the constraints until a valid solution is found or all possibilities are exhausted.
+        Variables are selected by Minimum-Remaining-Values (smallest domain first) and their values are
+        tried in Least-Constraining-Value order. Since forward checking keeps every unassigned domain
+        consistent with the assignments so far, any value left in a domain may be assigned without
+        re-checking the constraints, and the search works on bitmasks alone. Since the constraints
+        between assigned and unassigned variables are already folded into the unassigned domains,
+        the remaining subproblem is just those domains; once few enough variables are left, the
+        ones known to fail are remembered in no_good so that a different branch reaching the same
+        domains never expands them again.
+        
+        On failure, the conflict set of assigned variables responsible is returned so that callers
+        whose own assignment played no part in it can jump straight back past themselves
+        (conflict-directed backjumping) rather than pointlessly trying their other values.
 
         Parameters:
-            assignments (List[Any]): A list of current assignments for each variable (meeting).
-            vars (int): The number of variables (meetings).
-            doms (list[set[datetime]]): The domains for each variable (the available datetimes for each meeting).
-            constraints (set[DateConstraint]): A set of DateConstraints that must be satisfied for the solution.
+            assignments (list[Optional[int]]): The index into universe currently assigned to each variable (meeting).
+            unassigned (set[int]): The indexes of the variables (meetings) in the component being searched
+                                   that have not yet been assigned.
+            masks (list[int]): The domain bitmask for each variable (the available datetimes for each meeting).
+            neighbors (list[list[tuple[int, list[int]]]]): For each variable, its (neighbor, supports) pairs.
+            pruned_by (list[set[int]]): For each variable, the assigned variables whose forward checking pruned its domain.
+            no_good (NoGoods): The failed remaining subproblems seen so far.
 
         Returns:
-            Optional[list[datetime]]:
-                If a valid assignment is found, returns a list of datetime values assigned to each variable (meeting).
-                If no solution is found, returns None.
+            tuple[bool, set[int]]:
+                (True, an empty set) if a valid assignment is found, in which case it is left in assignments.
+                (False, the conflict set) if no solution is found.
         '''
         
-        # Loop until all assignments are complete or no solution found
-        for assignment in assignments:
-            if assignment:
-                continue
+        if not unassigned:
+            return True, set()
+        
+        nonlocal nodes_left
+        if nodes_left is not None:
+            if not nodes_left:
+                raise SearchBudgetExceeded()
+            nodes_left -= 1
+        
+        key = no_good.key(unassigned, masks)
+        if key is not None and key in no_good:
+            # Whatever assignments led here, only the ones that pruned these domains can be to blame
+            return False, set().union(*(pruned_by[var] for var in unassigned))
+        
+        # MRV: the unassigned variable with the fewest remaining values fails (or succeeds) fastest
+        current_var = min(unassigned, key=lambda i: masks[i].bit_count())
+        unassigned.remove(current_var)
+        
+        # The values missing from this variable's domain were ruled out by whoever pruned it
+        conflict = set(pruned_by[current_var])
+        
+        # The unassigned neighbors are the same for every value tried below, so filter them once
+        live_neighbors = [(neighbor, supports) for neighbor, supports in neighbors[current_var] if neighbor in unassigned]
+        
+        # LCV: try first the values that rule out the fewest values of unassigned neighbors
+        for value in sorted(set_bits(masks[current_var]), key=lambda value: eliminated_values(value, masks, live_neighbors)):
+            assignments[current_var] = value
+            consistent, trail = forward_check(current_var, value, masks, live_neighbors, pruned_by)
+            if consistent:
+                found, child_conflict = recursive_csp_backtracker(assignments, unassigned, masks, neighbors, pruned_by, no_good)
             else:
-                current_var = assignments.index(assignment)
-                for dom in doms[current_var]:
-                    assignments[current_var] = dom
-                    satisfied = True
-                    for constraint in constraints: # Loops until all constraints are satisfied
-                        if not constraint.is_satisfied_by_assignment(assignments):
-                            satisfied = False
-                            assignments[current_var] = None
-                            break
-                    if satisfied:
-                        result = recursive_csp_backtracker(assignments, vars, doms, constraints)
-                        if result:
-                            return result
-                    assignments[current_var] = None
-                return None
-        return assignments
+                # The neighbor wiped out last was emptied by its own pruners together with this assignment
+                found, child_conflict = False, set(pruned_by[trail[-1][0]])
+            for neighbor, removed in trail:
+                masks[neighbor] |= removed
+                pruned_by[neighbor].discard(current_var)
+            if found:
+                return True, set()
+            assignments[current_var] = None
+            
+            # Backjump: the failure below does not depend on this variable at all, so none of
+            # its other values can avoid it either
+            if current_var not in child_conflict:
+                conflict = child_conflict
+                break
+            conflict |= child_conflict
+            conflict.discard(current_var)
+        
+        unassigned.add(current_var)
+        if key is not None:
+            no_good.add(key)
+        return False, conflict
+    
+    def forward_check(var: int, value: int, masks: list[int], live_neighbors: list[tuple[int, list[int]]], pruned_by: list[set[int]]) -> tuple[bool, list[tuple[int, int]]]:
+        '''
+        Prunes from the domains of the var's unassigned neighbors every value that is inconsistent
+        with the given value having been assigned to the var. Stops early once a neighbor's domain
+        is wiped out, since no assignment can extend the current one from there.
+
+        Parameters:
+            var (int): The index of the variable (meeting) that was just assigned.
+            value (int): The index into universe of the value assigned to that variable.
+            masks (list[int]): The domain bitmask for each variable (the available datetimes for each meeting).
+            live_neighbors (list[tuple[int, list[int]]]): The var's (neighbor, supports) pairs for unassigned neighbors.
+            pruned_by (list[set[int]]): For each variable, the assigned variables whose forward checking pruned its domain.
+
+        Returns:
+            tuple[bool, list[tuple[int, int]]]:
+                Whether every neighbor's domain is still non-empty, and the trail of (neighbor, removed bits)
+                pairs that must be OR'd back into masks when backtracking out of this assignment. The
+                var is also recorded in pruned_by for every neighbor on the trail.
+        '''
+        trail: list[tuple[int, int]] = []
+        for neighbor, supports in live_neighbors:
+            removed = masks[neighbor] & ~supports[value]
+            if removed:
+                masks[neighbor] ^= removed
+                pruned_by[neighbor].add(var)
+                trail.append((neighbor, removed))
+                if not masks[neighbor]:
+                    return False, trail
+        return True, trail
+    
+    def eliminated_values(value: int, masks: list[int], live_neighbors: list[tuple[int, list[int]]]) -> int:
+        '''
+        Counts how many values in the domains of the var's unassigned neighbors would be ruled
+        out by assigning the given value to the var; used for Least-Constraining-Value ordering.
+
+        Parameters:
+            value (int): The index into universe of the candidate value for the variable about to be assigned.
+            masks (list[int]): The domain bitmask for each variable (the available datetimes for each meeting).
+            live_neighbors (list[tuple[int, list[int]]]): That variable's (neighbor, supports) pairs for unassigned neighbors.
+
+        Returns:
+            int: The number of neighbor values inconsistent with the candidate value.
+        '''
+        eliminated = 0
+        for neighbor, supports in live_neighbors:
+            eliminated += (masks[neighbor] & ~supports[value]).bit_count()
+        return eliminated
+    
+    def support_row(op: str, value: int) -> int:
+        '''
+        Builds the bitmask of every value in the universe that satisfies (value op other);
+        since the universe is sorted and bit i stands for universe[i], each op is just a run
+        of bits below or above the value's own bit, that bit alone, or all bits but it.
+
+        Parameters:
+            op (str): One of DateConstraint._VALID_OPS, with value on its left-hand side.
+            value (int): The index into universe of the left-hand value.
+
+        Returns:
+            int: The bitmask of compatible right-hand values (may have bits set beyond the universe).
+        '''
+        below = (1 << value) - 1
+        if op == "==": return 1 << value
+        if op == "!=": return ~(1 << value)
+        if op == ">": return below
+        if op == ">=": return below | 1 << value
+        if op == "<": return ~(below | 1 << value)
+        if op == "<=": return ~below
+        raise ValueError("[X] Cannot build support for invalid OP " + op)
+    
+    def set_bits(mask: int) -> list[int]:
+        '''
+        Lists the indexes of the bits set in the given domain bitmask, lowest first.
+
+        Parameters:
+            mask (int): A domain bitmask.
+
+        Returns:
+            list[int]: The index into universe of every value in the domain.
+        '''
+        bits: list[int] = []
+        while mask:
+            lowest = mask & -mask
+            bits.append(lowest.bit_length() - 1)
+            mask ^= lowest
+        return bits
      
 
     return csp_backtracker(n_meetings, date_range, constraints)
 
+def solve_component(job: tuple[int, tuple[int, list[set[datetime]], set[DateConstraint]]]) -> tuple[int, Optional[list[datetime]]]:
+    '''
+    Solves one connected component restated as its own CSP; run in a worker process,
+    so it lives at module level where the pool can find it.
+
+    Parameters:
+        job (tuple[int, tuple[int, list[set[datetime]], set[DateConstraint]]]):
+            The component's position among those sent to the pool, and the arguments
+            to pass to solve for it.
+
+    Returns:
+        tuple[int, Optional[list[datetime]]]:
+            The component's position, so its solution can be matched back up with its
+            meetings, and that solution (None when it has none).
+    '''
+    position, args = job
+    return position, solve(*args)
+
+class SearchBudgetExceeded(Exception):
+    '''
+    Raised by the backtracker to abandon the search of a component that has run out of
+    search nodes, so that it can be handed to a worker process instead.
+    '''
+
+class NoGoods:
+    '''
+    The backtracker's cache of failed subproblems, each remembered by the domains of its
+    unassigned variables. Bounded by the total number of (variable, domain) pairs held
+    rather than the number of subproblems, so its memory stays bounded however big the
+    subproblems are; the oldest are evicted first.
+    '''
+    
+    __slots__ = ("_subproblems", "_size")
+    
+    def __init__(self) -> None:
+        self._subproblems: dict[frozenset[int], None] = {}
+        self._size: int = 0
+    
+    def __contains__(self, key: frozenset[int]) -> bool:
+        return key in self._subproblems
+    
+    def key(self, unassigned: set[int], masks: list[int]) -> Optional[frozenset[int]]:
+        '''
+        Builds the key of the subproblem left by the given unassigned variables, packing
+        each (variable, domain bitmask) pair into a single int.
+
+        Parameters:
+            unassigned (set[int]): The indexes of the variables (meetings) not yet assigned.
+            masks (list[int]): The domain bitmask for each variable (the available datetimes for each meeting).
+
+        Returns:
+            Optional[frozenset[int]]:
+                The subproblem's key, or None if it has more than NO_GOOD_MAX_MEETINGS variables
+                left and so is not worth remembering.
+        '''
+        if len(unassigned) > NO_GOOD_MAX_MEETINGS:
+            return None
+        return frozenset([masks[var] * len(masks) + var for var in unassigned])
+    
+    def add(self, key: frozenset[int]) -> None:
+        '''
+        Remembers the subproblem with the given key as failed, evicting the oldest ones as
+        needed to stay within NO_GOOD_CACHE_SIZE pairs.
+
+        Parameters:
+            key (frozenset[int]): The failed subproblem's key, as built by key.
+        '''
+        self._subproblems[key] = None
+        self._size += len(key)
+        while self._size > NO_GOOD_CACHE_SIZE:
+            oldest = next(iter(self._subproblems))
+            del self._subproblems[oldest]
+            self._size -= len(oldest)
+
 # CSP Filtering: Node Consistency
 # ---------------------------------------------------------------------------
 def node_consistency(domains: list[set[datetime]], constraints: set[DateConstraint]) -> None:
@@ -139,19 +549,16 @@ def node_consistency(domains: list[set[datetime]], constraints: set[DateConstrai
         directly within the provided domains parameter
     ''' 
     
-    # Create copy to prevent error of set size changing during iteration
-    dom_copy: list[set[datetime]] = [set(dom) for dom in domains]
-
-    for current_index, dom in enumerate(domains):
-        current_dom = dom_copy[current_index]
-        for date in dom:
-            for constraint in constraints:
-                if constraint.arity() == 1 and constraint.L_VAL == current_index: # Check for unary constraints
-                    if not constraint.is_satisfied_by_values(date):
-                        current_dom.remove(date)
-                else: 
-                    continue
-        domains[current_index] = current_dom
+    # Bucket the unary constraints by their variable so each domain is only
+    # filtered against the constraints that actually mention it
+    unaries_by_var: dict[int, list[DateConstraint]] = {}
+    for constraint in constraints:
+        if constraint.arity() == 1:
+            unaries_by_var.setdefault(constraint.L_VAL, []).append(constraint)
+
+    for current_index, unaries in unaries_by_var.items():
+        if current_index < len(domains):
+            domains[current_index] = {date for date in domains[current_index] if all(constraint.is_satisfied_by_values(date) for constraint in unaries)}
 
 
 
@@ -178,6 +585,9 @@ class Arc:
         HEAD = CONSTRAINT.R_VAL
     '''
     
+    # Fixed attribute layout: AC-3 creates many Arcs and none of them need a __dict__
+    __slots__ = ("CONSTRAINT", "TAIL", "HEAD", "_h")
+    
     def __init__(self, constraint: DateConstraint):
         '''
         Constructs a new Arc from the given DateConstraint, setting this Arc's
@@ -193,6 +603,8 @@ class Arc:
             self.HEAD: int = constraint.R_VAL
         else:
             raise ValueError("[X] Cannot create Arc from Unary Constraint")
+        # Arcs never change after construction, so their hash can be computed once
+        self._h: int = hash((self.CONSTRAINT, self.TAIL, self.HEAD))
     
     def __eq__(self, other: Any) -> bool:
         if other is None: return False
@@ -200,7 +612,7 @@ class Arc:
         return self.CONSTRAINT == other.CONSTRAINT and self.TAIL == other.TAIL and self.HEAD == other.HEAD
     
     def __hash__(self) -> int:
-        return hash((self.CONSTRAINT, self.TAIL, self.HEAD))
+        return self._h
     
     def __str__(self) -> str:
         return "Arc[" + str(self.CONSTRAINT) + ", (" + str(self.TAIL) + " -> " + str(self.HEAD) + ")]"
@@ -208,7 +620,7 @@ class Arc:
     def __repr__(self) -> str:
         return self.__str__()
 
-def arc_consistency(domains: list[set[datetime]], constraints: set[DateConstraint]) -> None:
+def arc_consistency(domains: list[set[datetime]], constraints: set[DateConstraint]) -> bool:
     '''
     Enforces arc consistency for all variables' domains given in the set of domains.
     Meetings' domains' index in each of the provided constraints correspond to their index
@@ -228,39 +640,76 @@ def arc_consistency(domains: list[set[datetime]], constraints: set[DateConstrain
             that might be found, and useful methods for implementing this solver.
             [!] Hint: see a DateConstraint's is_satisfied_by_values
     
+    Returns:
+        bool:
+            True if every domain is still non-empty afterwards
+            False if some domain was wiped out, meaning that the CSP is unsatisfiable
+    
     Side Effects:
-        Although no values are returned, the values in any pruned domains are changed
-        directly within the provided domains parameter
+        The values in any pruned domains are changed directly within the provided
+        domains parameter
     '''
     
-    def ac_preprocessing(doms: list[set[datetime]], constraints: set[DateConstraint]) -> None:
+    def ac_preprocessing(doms: list[set[datetime]], binary: list[DateConstraint]) -> None:
         '''
-        Processes the given constraints to identify binary constraints (arity of 2) and
-        initializes the set of arcs. The function adds arcs to a set, then processes each
-        arc, removing inconsistent values from the domains of the variables involved.
+        Processes the given binary constraints (arity of 2) and initializes the queue of
+        arcs. The function processes the arcs whose heads have the smallest domains first,
+        since those are the most likely to prune (and to detect an empty domain early),
+        removing inconsistent values from the domains of the variables involved and
+        re-queueing the arcs pointing at any variable whose domain shrank. As soon as a
+        domain is wiped out, every domain connected to it is emptied directly, since
+        propagation would otherwise empty them one revision at a time.
 
         Parameters:
             doms (list[set[datetime]]): The list of domains for each variable (meeting).
-            constraints (set[DateConstraint]): The set of constraints specifying the relationships
-                                               between meetings.
+            binary (list[DateConstraint]): The binary constraints specifying the relationships
+                                           between meetings.
         
         '''
         
-        arcs = set()
+        # Every arc is created exactly once (a constraint given in both orientations yields
+        # the same pair of arcs) and is referred to by its index in all_arcs from then on,
+        # so re-queueing an arc never allocates or hashes anything
+        all_arcs: list[Arc] = []
+        arc_of: dict[DateConstraint, int] = {}
         
-        # Initialize arcs
-        for constraint in constraints:
-            if constraint.arity() > 1:
-                arcs.add(Arc(constraint))
-                arcs.add(Arc(constraint.get_reverse()))
+        # Parallel to all_arcs, so the loop below reads plain lists instead of Arc attributes
+        arc_tails: list[int] = []
+        arc_heads: list[int] = []
         
-        # Loops until arc set is empty        
-        while arcs:
-            current_arc = arcs.pop() 
-            if inconsistent_val_removal(domains, current_arc):
-                for constraint in constraints:
-                    if constraint.arity() > 1 and constraint.R_VAL == current_arc.TAIL: # Check for binary constraints
-                        arcs.add(Arc(constraint))         
+        # Initialize arcs, indexed by HEAD so that the arcs to revisit after a
+        # tail's domain shrinks are found without rescanning every constraint
+        arcs_by_head: dict[int, list[int]] = {}
+        for constraint in binary:
+            for oriented in (constraint, constraint.get_reverse()):
+                if oriented in arc_of:
+                    continue
+                arc = Arc(oriented)
+                arc_of[oriented] = len(all_arcs)
+                arcs_by_head.setdefault(arc.HEAD, []).append(len(all_arcs))
+                all_arcs.append(arc)
+                arc_tails.append(arc.TAIL)
+                arc_heads.append(arc.HEAD)
+        
+        # Heap entries are (head domain size, arc index); the index also breaks ties
+        queue = [(len(doms[head]), arc_index) for arc_index, head in enumerate(arc_heads)]
+        heapify(queue)
+        in_queue = bytearray(b"\x01") * len(all_arcs)
+        
+        # Loops until arc queue is empty
+        revisit = arcs_by_head.get
+        while queue:
+            current_index = heappop(queue)[1]
+            in_queue[current_index] = 0
+            if inconsistent_val_removal(doms, all_arcs[current_index]):
+                tail = arc_tails[current_index]
+                if not doms[tail]:
+                    wipe_out(doms, tail, arc_tails, arcs_by_head)
+                    continue
+                for arc_index in revisit(tail, []):
+                    if not in_queue[arc_index]:
+                        heappush(queue, (len(doms[arc_heads[arc_index]]), arc_index))
+                        in_queue[arc_index] = 1
             
     def inconsistent_val_removal(doms: list[set[datetime]], current_arc: Arc) -> bool:
         '''
@@ -275,23 +724,38 @@ def arc_consistency(domains: list[set[datetime]], constraints: set[DateConstrain
         Returns:
             bool: True if any value was removed from the tail's domain, False otherwise.
         '''
-        removed = False
         tail_dom = doms[current_arc.TAIL]
-        head_dom = doms[current_arc.HEAD]
+        supported = current_arc.CONSTRAINT.valid_tails_for(tail_dom, doms[current_arc.HEAD])
         
-        # Create copy to prevent error of set size changing during iteration
-        tail_dom_copy = tail_dom.copy()
-        for tail in tail_dom_copy:
-            inconsistent = True
-            for head in head_dom:
-                if current_arc.CONSTRAINT.is_satisfied_by_values(tail, head):
-                    inconsistent = False
-                    break
-            if inconsistent:
-                tail_dom.remove(tail)
-                removed = True
-
-        return removed
-    
-    ac_preprocessing(domains, constraints)
+        # supported is a subset of tail_dom, so equal sizes mean nothing was removed
+        if len(supported) == len(tail_dom):
+            return False
+        tail_dom.intersection_update(supported)
+        return True
+    
+    def wipe_out(doms: list[set[datetime]], var: int, arc_tails: list[int], arcs_by_head: dict[int, list[int]]) -> None:
+        '''
+        Empties the domain of every variable connected to the given one by some chain of
+        arcs, which is where AC-3 would end up once the given variable's domain is empty.
+        Arcs among these variables that are still queued then revise nothing.
+
+        Parameters:
+            doms (list[set[datetime]]): The list of domains for each variable (meeting).
+            var (int): The variable whose domain was wiped out.
+            arc_tails (list[int]): The TAIL of every arc, by index.
+            arcs_by_head (dict[int, list[int]]): The indexes of the arcs into each variable.
+        '''
+        frontier = [var]
+        while frontier:
+            head = frontier.pop()
+            for arc_index in arcs_by_head.get(head, []):
+                tail = arc_tails[arc_index]
+                if doms[tail]:
+                    doms[tail].clear()
+                    frontier.append(tail)
+    
+    # Partition once; nothing below ever needs to look at the unary constraints
+    binary = [constraint for constraint in constraints if constraint.arity() > 1]
+    ac_preprocessing(domains, binary)
+    return all(domains)
         
@@ -1,8 +1,11 @@
 import unittest
 import pytest
+from copy import deepcopy
+from unittest import mock
 from datetime import *
 from date_constraints import *
 from csp_solver import *
+import csp_solver
 
 class CSPTests(unittest.TestCase):
     """
@@ -66,6 +69,36 @@ class CSPTests(unittest.TestCase):
                 pytest.fail("[X] Your solution violated a constraint:\n  [S] Solution: " + str(valid_solution) + "\n  [C] Constraint: " + str(constraint))
         pass
     
+    def count_search_nodes(self, n_meetings: int, date_range: list[set[datetime]] | set[datetime], constraints: set[DateConstraint]) -> tuple[Optional[list[datetime]], int]:
+        '''
+        Solves the given CSP while counting the nodes expanded by the backtracking search,
+        for tests that check how much searching a problem takes rather than just its answer.
+        
+        Parameters:
+            n_meetings (int):
+                The number of meetings that must be scheduled
+            date_range (list[set[datetime]] | set[datetime]):
+                The range of datetimes in which the meetings must be scheduled
+            constraints (set[DateConstraint]):
+                The set of DateConstraints that must all be satisfied
+        
+        Returns:
+            tuple[Optional[list[datetime]], int]
+                The solver's answer, and the number of search nodes it took to find it
+        '''
+        nodes = 0
+        
+        # The search asks its no-good cache for a key at every node it expands
+        class CountingNoGoods(NoGoods):
+            def key(self, unassigned: set[int], masks: list[int]) -> Optional[frozenset[int]]:
+                nonlocal nodes
+                nodes += 1
+                return super().key(unassigned, masks)
+        
+        with mock.patch.object(csp_solver, "NoGoods", CountingNoGoods):
+            solution = solve(n_meetings, date_range, constraints)
+        return solution, nodes
+    
     # CSP Filtering Tests
     # ---------------------------------------------------------------------------
     def test_csp_node_consistency_t0(self) -> None:
@@ -248,6 +281,54 @@ class CSPTests(unittest.TestCase):
         self.assertEqual(3, len(domains[0]))
         self.assertEqual(2, len(domains[1]))
         self.assertEqual(2, len(domains[2]))
+        
+    def test_csp_arc_consistency_t7(self) -> None:
+        constraints = {
+            DateConstraint(0, "<", 1),
+            DateConstraint(1, "<", 2),
+            DateConstraint(2, "<", 3)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 4)
+        n_meetings = 4
+        domains: list[set[datetime]] = [deepcopy(possible_dates) for n in range(n_meetings)]
+        
+        # Every pruning must propagate down the whole chain, in both directions
+        arc_consistency(domains, constraints)
+        
+        for index in range(n_meetings):
+            self.assertEqual({datetime(2023, 1, 1 + index)}, domains[index])
+        
+    def test_csp_arc_consistency_t8(self) -> None:
+        constraints = {
+            DateConstraint(0, "<", 1),
+            DateConstraint(1, "<", 0),
+            DateConstraint(2, "!=", 3)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 5)
+        n_meetings = 4
+        domains: list[set[datetime]] = [deepcopy(possible_dates) for n in range(n_meetings)]
+        
+        # Only the unsatisfiable pair gets nuked; the other pair is untouched
+        self.assertFalse(arc_consistency(domains, constraints))
+        self.assertEqual(0, len(domains[0]))
+        self.assertEqual(0, len(domains[1]))
+        self.assertEqual(5, len(domains[2]))
+        self.assertEqual(5, len(domains[3]))
+        
+        domains = [deepcopy(possible_dates) for n in range(n_meetings)]
+        self.assertTrue(arc_consistency(domains, {DateConstraint(2, "!=", 3)}))
+        
+    def test_csp_valid_tails_t0(self) -> None:
+        tail_dom = self.generate_dates(datetime(2023, 1, 1), 5)
+        head_dom = {datetime(2023, 1, 2), datetime(2023, 1, 4)}
+        
+        # Each op's fast path must agree with checking every (tail, head) pair
+        for op in DateConstraint._VALID_OPS:
+            constraint = DateConstraint(0, op, 1)
+            expected = {tail for tail in tail_dom if any(constraint.is_satisfied_by_values(tail, head) for head in head_dom)}
+            self.assertEqual(expected, constraint.valid_tails_for(tail_dom, head_dom))
+            self.assertEqual(set(), constraint.valid_tails_for(tail_dom, set()))
+        self.assertEqual(4, len(DateConstraint(0, "!=", 1).valid_tails_for(tail_dom, {datetime(2023, 1, 3)})))
     
     # TODO
     
@@ -423,4 +504,187 @@ class CSPTests(unittest.TestCase):
         # Example Solution:
         # [2023-05-31, 2023-04-30, 2023-04-28, 2023-04-29, 2023-05-30]
         self.validate_solution(n_meetings, solution, constraints)
-        
\ No newline at end of file
+            
+    def test_csp_backtracking_t10(self) -> None:
+        constraints = {
+            DateConstraint(0, "<", 1),
+            DateConstraint(1, "<", 2)
+        }
+        # Each meeting is given its own domain; pruning one of them must not
+        # prune the others
+        domains = [
+            self.generate_dates(datetime(2023, 1, 1), 2),
+            self.generate_dates(datetime(2023, 1, 2), 2),
+            self.generate_dates(datetime(2023, 1, 3), 2)
+        ]
+        n_meetings = 3
+        solution = solve(n_meetings, domains, constraints)
+        
+        # Example Solution:
+        # [2023-01-01, 2023-01-02, 2023-01-03]
+        self.validate_solution(n_meetings, solution, constraints)
+        self.assertEqual(2, len(domains[0]))
+    
+    def test_csp_backtracking_t11(self) -> None:
+        constraints = {
+            DateConstraint(0, "<=", 0),
+            DateConstraint(1, "!=", 1)
+        }
+        # A meeting can always be on or before itself, but never on a
+        # different date from itself, so no solution here!
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 3)
+        n_meetings = 2
+        solution = solve(n_meetings, possible_dates, constraints)
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+    
+    def test_csp_backtracking_t12(self) -> None:
+        # Two independent rings of 14 meetings each, where every meeting must
+        # differ from the next one around its ring; each takes only a handful
+        # of search nodes, so no worker processes are started for them unless
+        # parallel solving is asked for, the node budget is cut below that and
+        # there are at least 2 CPUs to run them on
+        ring_size = 14
+        constraints = set()
+        for offset in (0, ring_size):
+            for index in range(ring_size):
+                constraints.add(DateConstraint(offset + index, "!=", offset + (index + 1) % ring_size))
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 3)
+        n_meetings = 2 * ring_size
+        with mock.patch.object(csp_solver, "Pool", wraps=csp_solver.Pool) as pool:
+            solution = solve(n_meetings, possible_dates, constraints)
+            self.validate_solution(n_meetings, solution, constraints)
+            solution = solve(n_meetings, possible_dates, constraints, parallel=True)
+            self.validate_solution(n_meetings, solution, constraints)
+            pool.assert_not_called()
+            with (
+                mock.patch.object(csp_solver, "PARALLEL_NODE_BUDGET", 10),
+                mock.patch.object(csp_solver, "cpu_count", return_value=2)
+            ):
+                solution = solve(n_meetings, possible_dates, constraints, parallel=True)
+            self.validate_solution(n_meetings, solution, constraints)
+            pool.assert_called_once()
+        
+        # Only 2 dates makes each (even length) ring 2-colorable, but pinning
+        # two adjacent meetings to the same date breaks the second ring
+        constraints.add(DateConstraint(ring_size, "==", datetime(2023, 1, 1)))
+        constraints.add(DateConstraint(ring_size + 1, "==", datetime(2023, 1, 1)))
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 2)
+        solution = solve(n_meetings, possible_dates, constraints, parallel=True)
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+        
+        # Nothing short of searching shows that 3 meetings in a triangle of
+        # differences can't fit in 2 dates; that takes the triangle just a
+        # few nodes, so it fails before any workers are started for the rings
+        constraints = {
+            DateConstraint(offset + index, "!=", offset + (index + 1) % ring_size)
+            for offset in (0, ring_size) for index in range(ring_size)
+        }
+        triangle = 2 * ring_size
+        constraints |= {
+            DateConstraint(triangle, "!=", triangle + 1),
+            DateConstraint(triangle + 1, "!=", triangle + 2),
+            DateConstraint(triangle + 2, "!=", triangle)
+        }
+        n_meetings = triangle + 3
+        with (
+            mock.patch.object(csp_solver, "Pool", wraps=csp_solver.Pool) as pool,
+            mock.patch.object(csp_solver, "PARALLEL_NODE_BUDGET", 10),
+            mock.patch.object(csp_solver, "cpu_count", return_value=2)
+        ):
+            solution = solve(n_meetings, possible_dates, constraints, parallel=True)
+            pool.assert_not_called()
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+        
+        # 12 meetings that must all be on different days, but only 11 days;
+        # again only search can tell, this time in a worker process, next to
+        # a ring that can be solved
+        pigeons = 12
+        constraints = {
+            DateConstraint(index, "!=", (index + 1) % ring_size)
+            for index in range(ring_size)
+        }
+        constraints |= {
+            DateConstraint(ring_size + left, "!=", ring_size + right)
+            for left in range(pigeons) for right in range(left + 1, pigeons)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), pigeons - 1)
+        n_meetings = ring_size + pigeons
+        with (
+            mock.patch.object(csp_solver, "Pool", wraps=csp_solver.Pool) as pool,
+            mock.patch.object(csp_solver, "PARALLEL_NODE_BUDGET", 10),
+            mock.patch.object(csp_solver, "cpu_count", return_value=2)
+        ):
+            solution = solve(n_meetings, possible_dates, constraints, parallel=True)
+            pool.assert_called_once()
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+    
+    def test_csp_backtracking_t13(self) -> None:
+        # 10 meetings that must all be on different days, but only 9 days
+        # to hold them in; every way of placing the first few meetings leaves
+        # the same impossible subproblem behind, so remembering the ones that
+        # failed keeps the search to a few thousand nodes (without that, it
+        # takes hundreds of thousands)
+        n_meetings = 10
+        constraints = {
+            DateConstraint(left, "!=", right)
+            for left in range(n_meetings) for right in range(left + 1, n_meetings)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), n_meetings - 1)
+        solution, nodes = self.count_search_nodes(n_meetings, possible_dates, constraints)
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+        self.assertGreater(nodes, 0)
+        self.assertLess(nodes, 5_000)
+    
+    def test_csp_backtracking_t14(self) -> None:
+        # Meeting 0 is searched first but rules nothing out for meeting 1,
+        # so once meetings 1, 2, 3 turn out not to fit in 2 days, the search
+        # should jump straight past 0 rather than retry it (no solution here!)
+        constraints = {
+            DateConstraint(0, "<=", 1),
+            DateConstraint(1, "!=", 2),
+            DateConstraint(2, "!=", 3),
+            DateConstraint(3, "!=", 1)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 2)
+        n_meetings = 4
+        solution = solve(n_meetings, possible_dates, constraints)
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+        
+        # Here a dead end deep in the search must jump back to the right
+        # meeting without skipping past the values that lead to a solution
+        constraints = {
+            DateConstraint(1, "!=", 3),
+            DateConstraint(4, "!=", 0),
+            DateConstraint(2, "!=", 0),
+            DateConstraint(1, "<", 0),
+            DateConstraint(3, "!=", 4),
+            DateConstraint(3, "<=", 4)
+        }
+        possible_dates = self.generate_dates(datetime(2023, 1, 1), 3)
+        n_meetings = 5
+        
+        # Example Solution:
+        # [2023-01-03, 2023-01-02, 2023-01-01, 2023-01-01, 2023-01-02]
+        solution = solve(n_meetings, possible_dates, constraints)
+        self.validate_solution(n_meetings, solution, constraints)
+        
+        # 8 meetings held apart from the rest, which are searched first (as
+        # they have the fewest days left) but rule nothing out for meeting 8;
+        # meetings 8 to 11 can't all differ in 3 days, and with no remembered
+        # failures to fall back on, only jumping back past all 8 of the first
+        # meetings keeps the search from retrying all 2^8 ways of placing them
+        free_meetings, core_meetings = 8, 4
+        free_dates = self.generate_dates(datetime(2023, 1, 4), 2)
+        core_dates = self.generate_dates(datetime(2023, 1, 1), 3)
+        domains = [set(free_dates) for _ in range(free_meetings)] + [set(core_dates) for _ in range(core_meetings)]
+        constraints = {DateConstraint(meeting, "!=", free_meetings) for meeting in range(free_meetings)}
+        constraints |= {
+            DateConstraint(free_meetings + left, "!=", free_meetings + right)
+            for left in range(core_meetings) for right in range(left + 1, core_meetings)
+        }
+        n_meetings = free_meetings + core_meetings
+        with mock.patch.object(csp_solver, "NO_GOOD_CACHE_SIZE", 0):
+            solution, nodes = self.count_search_nodes(n_meetings, domains, constraints)
+        self.validate_solution(n_meetings, solution, constraints, solution_expected=False)
+        self.assertGreater(nodes, 0)
+        self.assertLess(nodes, 100)
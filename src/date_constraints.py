@@ -1,6 +1,5 @@
-from dataclasses import *
-from datetime import *
-from typing import *
+from datetime import datetime
+from typing import Any, Optional, Union
 
 class DateConstraint:
     '''
@@ -175,6 +174,47 @@ class DateConstraint:
             raise ValueError("[X] The get_reverse method can only be used for BINARY constraints")
         return DateConstraint(self.R_VAL, self._get_symmetrical_op(), self.L_VAL)
     
+    def valid_tails_for(self, tail_dom: set[datetime], head_dom: set[datetime]) -> set[datetime]:
+        '''
+        Returns the values in the given tail_dom (candidates for this constraint's L_VAL)
+        that are consistent with at least one value in the given head_dom (candidates
+        for this constraint's R_VAL).
+        
+        [!] Computes the result with set operations and a single min / max of the head_dom
+        rather than checking every (tail, head) pair, which makes it the fast path for
+        revising arcs during Arc Consistency
+        
+        [!] ONLY applicable to Binary Date Constraints -- will raise error for unary date constraints
+        
+        Parameters:
+            tail_dom (set[datetime]):
+                The domain of this constraint's L_VAL
+            head_dom (set[datetime]):
+                The domain of this constraint's R_VAL
+        
+        Returns:
+            set[datetime]:
+                The subset of tail_dom with at least one supporting value in head_dom
+        
+        Example:
+            binary_dc = DateConstraint(0, "<", 1)
+            binary_dc.valid_tails_for({datetime(2023, 1, 1), datetime(2023, 1, 3)}, {datetime(2023, 1, 2)})
+                => {datetime(2023, 1, 1)}
+        '''
+        if not isinstance(self.R_VAL, int):
+            raise ValueError("[X] The valid_tails_for method can only be used for BINARY constraints")
+        if not head_dom:
+            return set()
+        if self.OP == "==": return tail_dom & head_dom
+        if self.OP == "!=": return tail_dom - head_dom if len(head_dom) == 1 else set(tail_dom)
+        # The ordering ops only need the most permissive head value as a witness
+        earliest, latest = min(head_dom), max(head_dom)
+        if self.OP == ">": return {tail for tail in tail_dom if tail > earliest}
+        if self.OP == "<": return {tail for tail in tail_dom if tail < latest}
+        if self.OP == ">=": return {tail for tail in tail_dom if tail >= earliest}
+        if self.OP == "<=": return {tail for tail in tail_dom if tail <= latest}
+        raise ValueError("[X] Date constraint " + str(self) + " has invalid OP.")
+    
     # "Private" Helpers Below
     # [!] You should not need to call any of these directly in your implementation
     # ---------------------------------------------------------------------------